@@ -1,16 +1,180 @@
 import streamlit as st
+import functools
 import pandas as pd
 import plotly.graph_objects as go
 from datetime import date, timedelta
 import base64
+import gzip
+import hashlib
 from io import BytesIO
 import numpy as np
 
+from kernels import daily_ohlc
+
+TRADE_COLUMNS = ["Date", "Type", "R_Value", "Amount", "Image", "Notes"]
+TYPE_MULT = {"W2R": 2.0, "W1R": 1.0, "L1R": -1.0, "L2R": -2.0}
+TRADE_TYPES = [*TYPE_MULT, "Custom $"]
+# The type buffer is sized from the options so no trade type gets truncated
+TRADE_ARRAYS = {"date": "datetime64[D]", "type": f"U{max(map(len, TRADE_TYPES))}", "r": "f8", "amount": "f8", "cum": "f8", "has_image": "?"}
+
+# ====== TRADE STORE ======
+# Trades are kept column-wise: typed NumPy buffers for the numeric/temporal
+# fields plus a plain list for notes. Image bytes live in a separate
+# session-state table keyed by trade id (the trade's position in the store).
+def new_trade_store(capacity=64):
+    store = {name: np.empty(capacity, dtype) for name, dtype in TRADE_ARRAYS.items()}
+    store.update(count=0, running_total=0.0, notes=[])
+    return store
+
+def append_trade(store, trade_date, trade_type, r_value, amount, has_image, note):
+    n = store["count"]
+    if n == len(store["date"]):
+        # Double the buffers so appends stay amortized O(1)
+        for name in TRADE_ARRAYS:
+            store[name] = np.concatenate([store[name], np.empty_like(store[name])])
+    
+    store["date"][n] = trade_date
+    store["type"][n] = trade_type
+    store["r"][n] = np.nan if r_value is None else r_value
+    store["amount"][n] = amount
+    store["running_total"] += amount
+    store["cum"][n] = store["running_total"]
+    store["has_image"][n] = has_image
+    store["notes"].append(note)
+    store["count"] = n + 1
+    return n
+
+def trade_snapshot(store):
+    # Filled part of each buffer, plus the notes as a hashable tuple
+    n = store["count"]
+    return (*(store[name][:n] for name in TRADE_ARRAYS), tuple(store["notes"]))
+
 # Initialize session state
 if 'trades' not in st.session_state:
-    st.session_state.trades = pd.DataFrame(columns=[
-        "Date", "Type", "R_Value", "Amount", "Image", "Notes"
-    ])
+    st.session_state.trades = new_trade_store()
+if 'images' not in st.session_state:
+    st.session_state.images = {}
+if 'image_digests' not in st.session_state:
+    st.session_state.image_digests = {}
+
+# ====== CACHED COMPUTATIONS ======
+@st.cache_resource
+def cache_stats():
+    # Process-wide, like the st.cache_data caches it describes
+    return {}
+
+def counted_cache(func=None, **cache_kwargs):
+    # st.cache_data that also counts calls and misses, so hits = calls - misses
+    def decorate(func):
+        stats = cache_stats().setdefault(func.__name__.lstrip("_"), {"calls": 0, "misses": 0})
+        
+        @functools.wraps(func)
+        def compute(*args):
+            stats["misses"] += 1
+            return func(*args)
+        cached = st.cache_data(**cache_kwargs)(compute)
+        
+        @functools.wraps(func)
+        def call(*args):
+            stats["calls"] += 1
+            return cached(*args)
+        call.clear = cached.clear
+        return call
+    
+    return decorate(func) if func is not None else decorate
+
+# These caches are process-wide and their keys change with every saved trade
+# or filter choice, so each one is bounded to keep old entries from piling up.
+@counted_cache(max_entries=32)
+def _enrich(dates, types, r_values, amounts, cumulative, has_image, notes):
+    df = pd.DataFrame({
+        "Date": dates,
+        "Type": types,
+        "R_Value": r_values,
+        "Amount": amounts,
+        "Has_Image": has_image,
+        "Notes": list(notes)
+    })
+    # Arrow-backed strings keep Type/Notes in contiguous buffers instead of
+    # Python objects
+    df = df.astype({"Type": "string[pyarrow]", "Notes": "string[pyarrow]", "Date": "datetime64[ns]"})
+    
+    # Stable sort keeps same-day trades in entry order; this is the only sort,
+    # views further down reuse it
+    df = df.sort_values("Date", kind="stable")
+    
+    # R-based trades are re-derived from Type and R in one vectorized pass
+    df["Amount"] = np.where(
+        df["Type"].eq("Custom $").to_numpy(bool),
+        df["Amount"].to_numpy(np.float64),
+        df["Type"].map(TYPE_MULT).to_numpy(np.float64) * df["R_Value"].to_numpy(np.float64)
+    )
+    
+    # Period keys for the time filters, built once per change of trades. The
+    # frame is date-sorted, so unique()[::-1] lists them newest first.
+    df["_week"] = df["Date"].dt.to_period("W")
+    df["_month"] = df["Date"].dt.to_period("M")
+    df["_quarter"] = df["Date"].dt.to_period("Q")
+    
+    # Calculate cumulative metrics. The store keeps a running total per insert,
+    # which is already chronological when trades were entered oldest-first.
+    if (np.diff(dates) >= 0).all():
+        df["Cumulative_PnL"] = cumulative
+    else:
+        df["Cumulative_PnL"] = df["Amount"].cumsum()
+    return df
+
+# uirevision keeps the client-side zoom/pan when a figure is re-sent
+@counted_cache(max_entries=32)
+def _candlestick_figure(dates, amt):
+    daily_df = daily_ohlc(dates, amt)
+    
+    fig = go.Figure(data=[go.Candlestick(
+        x=daily_df["Date"],
+        open=daily_df["Open"],
+        high=daily_df["High"],
+        low=daily_df["Low"],
+        close=daily_df["Close"],
+        name="Daily P&L"
+    )])
+    fig.update_layout(title="Daily P&L (Candlestick)", xaxis_title="Date", yaxis_title="Amount ($)",
+                      uirevision="constant")
+    return fig
+
+@counted_cache(max_entries=32)
+def _cumulative_figure(dates, cumulative):
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=dates,
+        y=cumulative,
+        mode="lines",
+        name="Cumulative P&L"
+    ))
+    fig.update_layout(title="Cumulative P&L", xaxis_title="Date", yaxis_title="Amount ($)",
+                      uirevision="constant")
+    return fig
+
+# Each export embeds every screenshot, so keep only a few and expire them
+@counted_cache(max_entries=4, ttl="1h")
+def _export_csv(snapshot, image_digests, _images):
+    df = _enrich(*snapshot)
+    
+    # Daily totals are only needed in the export, so they are computed here
+    daily_sum = df.groupby("Date", sort=False)["Amount"].sum()
+    df["Daily_PnL"] = df["Date"].map(daily_sum)
+    
+    # The CSV is the journal's only backup, so screenshots are embedded again
+    # as base64, looked up by trade id (the frame index). The cache is shared
+    # across sessions, so the blobs are keyed by their upload-time digests
+    # rather than hashed on every rerun.
+    df["Has_Image"] = [
+        base64.b64encode(gzip.decompress(_images[trade_id])).decode() if trade_id in _images else None
+        for trade_id in df.index
+    ]
+    df = df.rename(columns={"Has_Image": "Image"})
+    
+    # Underscore columns are internal filter keys, not journal data
+    return df.loc[:, ~df.columns.str.startswith("_")].to_csv(index=False).encode()
 
 # Page config
 st.set_page_config(layout="wide", page_title="Trading Journal")
@@ -23,7 +187,7 @@ with st.sidebar:
     with st.form("trade_form", clear_on_submit=True):
         # Trade type and R value
         col1, col2 = st.columns(2)
-        trade_type = col1.selectbox("Trade Type", ["W2R", "W1R", "L1R", "L2R", "Custom $"])
+        trade_type = col1.selectbox("Trade Type", TRADE_TYPES)
         r_value = col2.number_input("R Value ($)", min_value=0.01, value=None, placeholder="Enter R", step=0.01)
         
         # Amount calculation
@@ -34,8 +198,7 @@ with st.sidebar:
                 amount = None
                 st.warning("Enter R value to calculate P&L")
             else:
-                multiplier = float(trade_type[1:-1])
-                amount = multiplier * r_value if trade_type.startswith("W") else -multiplier * r_value
+                amount = TYPE_MULT[trade_type] * r_value
                 st.info(f"Calculated P&L: ${amount:.2f}")
         
         # Date and attachments
@@ -49,40 +212,24 @@ with st.sidebar:
             if (trade_type != "Custom $" and r_value is None) or amount is None:
                 st.error("Please enter all required fields")
             else:
-                # Handle image upload
-                img_str = None
+                # Add to trades (the DataFrame is only built at read time)
+                trade_id = append_trade(st.session_state.trades, trade_date, trade_type, r_value,
+                                        amount, uploaded_image is not None, notes)
+                
+                # Handle image upload (PNG/JPEG are already compressed, so level 1 is enough)
                 if uploaded_image:
                     img_bytes = uploaded_image.read()
-                    img_str = base64.b64encode(img_bytes).decode()
-                
-                # Add to trades
-                new_trade = pd.DataFrame([{
-                    "Date": trade_date,
-                    "Type": trade_type,
-                    "R_Value": r_value,
-                    "Amount": amount,
-                    "Image": img_str,
-                    "Notes": notes
-                }])
-                
-                st.session_state.trades = pd.concat(
-                    [st.session_state.trades, new_trade], 
-                    ignore_index=True
-                )
+                    st.session_state.images[trade_id] = gzip.compress(img_bytes, 1)
+                    st.session_state.image_digests[trade_id] = hashlib.sha256(img_bytes).digest()
                 st.success("Trade saved!")
 
 # ====== MAIN DASHBOARD ======
-if st.session_state.trades.empty:
+if st.session_state.trades["count"] == 0:
     st.info("No trades recorded yet. Add your first trade in the sidebar!")
 else:
-    # Convert to datetime for filtering
-    df = st.session_state.trades.copy()
-    df["Date"] = pd.to_datetime(df["Date"])
-    df = df.sort_values("Date")
-    
-    # Calculate cumulative metrics
-    df["Cumulative_PnL"] = df["Amount"].cumsum()
-    df["Daily_PnL"] = df.groupby("Date")["Amount"].transform("sum")
+    # Enriched frame is recomputed only when the trades change
+    snapshot = trade_snapshot(st.session_state.trades)
+    df = _enrich(*snapshot)
     
     # ====== TIME FILTERS ======
     st.header("🔍 Time Filters")
@@ -96,28 +243,30 @@ else:
             time_filter = st.selectbox("Filter By", ["Weekly", "Monthly", "Quarterly", "Custom Range"])
         
         with col3:
-    if time_filter == "Weekly":
-        selected_week = st.selectbox("Select Week", 
-                                   sorted(df["Date"].dt.to_period("W").unique(), reverse=True))
-        filtered_df = df[df["Date"].dt.to_period("W") == selected_week]
-    
-    elif time_filter == "Monthly":
-        selected_month = st.selectbox("Select Month", 
-                                    sorted(df["Date"].dt.to_period("M").unique(), reverse=True))
-        filtered_df = df[df["Date"].dt.to_period("M") == selected_month]
-    
-    elif time_filter == "Quarterly":
-        selected_quarter = st.selectbox("Select Quarter", 
-                                      sorted(df["Date"].dt.to_period("Q").unique(), reverse=True))
-        filtered_df = df[df["Date"].dt.to_period("Q") == selected_quarter
+            if time_filter == "Weekly":
+                selected_week = st.selectbox("Select Week", 
+                                           df["_week"].unique()[::-1])
+                filtered_df = df[df["_week"] == selected_week]
+            
+            elif time_filter == "Monthly":
+                selected_month = st.selectbox("Select Month", 
+                                            df["_month"].unique()[::-1])
+                filtered_df = df[df["_month"] == selected_month]
+            
+            elif time_filter == "Quarterly":
+                selected_quarter = st.selectbox("Select Quarter", 
+                                              df["_quarter"].unique()[::-1])
+                filtered_df = df[df["_quarter"] == selected_quarter]
             
             else:  # Custom Range
                 date_range = st.date_input("Select Date Range", 
                     [df["Date"].min(), df["Date"].max()])
                 if len(date_range) == 2:
-                    filtered_df = df[
-                        (df["Date"] >= pd.to_datetime(date_range[0])) & 
-                        (df["Date"] <= pd.to_datetime(date_range[1]))
+                    # Dates are sorted, so the range is a contiguous slice
+                    dates = df["Date"].to_numpy()
+                    lo_i = np.searchsorted(dates, pd.to_datetime(date_range[0]).to_datetime64(), "left")
+                    hi_i = np.searchsorted(dates, pd.to_datetime(date_range[1]).to_datetime64(), "right")
+                    filtered_df = df.iloc[lo_i:hi_i]
                 else:
                     filtered_df = df
     else:
@@ -127,14 +276,18 @@ else:
     st.header("📊 Performance Metrics")
     
     if not filtered_df.empty:
-        # Basic stats
-        total_trades = len(filtered_df)
-        winning_trades = len(filtered_df[filtered_df["Amount"] > 0])
-        losing_trades = len(filtered_df[filtered_df["Amount"] < 0])
+        # Basic stats (win/loss masks are built once and reused)
+        amt = filtered_df["Amount"].to_numpy(np.float64)
+        pos = amt > 0
+        neg = amt < 0
+        
+        total_trades = amt.size
+        winning_trades = int(pos.sum())
+        losing_trades = int(neg.sum())
         win_rate = winning_trades / total_trades if total_trades > 0 else 0
         
-        total_wins = filtered_df[filtered_df["Amount"] > 0]["Amount"].sum()
-        total_losses = abs(filtered_df[filtered_df["Amount"] < 0]["Amount"].sum())
+        total_wins = amt[pos].sum()
+        total_losses = -amt[neg].sum()
         
         profit_factor = total_wins / total_losses if total_losses > 0 else np.inf
         avg_win = total_wins / winning_trades if winning_trades > 0 else 0
@@ -142,9 +295,9 @@ else:
         expectancy = (avg_win * win_rate) + (-avg_loss * (1 - win_rate))
         
         # Drawdown calculation
-        cumulative = filtered_df["Amount"].cumsum()
-        peak = cumulative.expanding(min_periods=1).max()
-        drawdown = (cumulative - peak)
+        cumulative = np.cumsum(amt)
+        peak = np.maximum.accumulate(cumulative)
+        drawdown = cumulative - peak
         max_drawdown = drawdown.min()
         
         # Display metrics
@@ -158,51 +311,32 @@ else:
         col1.metric("Avg Win", f"${avg_win:.2f}")
         col2.metric("Avg Loss", f"${avg_loss:.2f}")
         col3.metric("Max Drawdown", f"${max_drawdown:.2f}")
-        col4.metric("Net P&L", f"${filtered_df['Amount'].sum():.2f}")
+        col4.metric("Net P&L", f"${amt.sum():.2f}")
         
         # ====== CHARTS ======
         st.header("📈 Performance Visualization")
         
+        # Figures are cached on the filtered data, so unrelated reruns reuse them
+        dates = filtered_df["Date"].to_numpy()
+        
         # Daily Candlestick Chart
-        daily_df = filtered_df.groupby("Date").agg({
-            "Amount": ["min", "max", "first", "last"]
-        }).reset_index()
-        daily_df.columns = ["Date", "Low", "High", "Open", "Close"]
-        
-        fig1 = go.Figure(data=[go.Candlestick(
-            x=daily_df["Date"],
-            open=daily_df["Open"],
-            high=daily_df["High"],
-            low=daily_df["Low"],
-            close=daily_df["Close"],
-            name="Daily P&L"
-        )])
-        fig1.update_layout(title="Daily P&L (Candlestick)", xaxis_title="Date", yaxis_title="Amount ($)")
+        fig1 = _candlestick_figure(dates, amt)
         st.plotly_chart(fig1, use_container_width=True)
         
         # Cumulative P&L Line Chart
-        fig2 = go.Figure()
-        fig2.add_trace(go.Scatter(
-            x=filtered_df["Date"],
-            y=filtered_df["Cumulative_PnL"],
-            mode="lines",
-            name="Cumulative P&L"
-        ))
-        fig2.update_layout(title="Cumulative P&L", xaxis_title="Date", yaxis_title="Amount ($)")
+        fig2 = _cumulative_figure(dates, filtered_df["Cumulative_PnL"].to_numpy(np.float64))
         st.plotly_chart(fig2, use_container_width=True)
         
         # ====== TRADE HISTORY ======
         st.header("📋 Trade History")
         
-        # Convert image data for display
-        display_df = filtered_df.copy()
-        display_df["Image"] = display_df["Image"].apply(
-            lambda x: "📷" if x else None
-        )
+        # Convert image flags for display
+        image_flag = np.where(filtered_df["Has_Image"].to_numpy(bool), "📷", None)
+        display_df = filtered_df.assign(Image=image_flag)[TRADE_COLUMNS]
         
         # Show dataframe with clickable images
         st.dataframe(
-            display_df[["Date", "Type", "R_Value", "Amount", "Image", "Notes"]].sort_values("Date", ascending=False),
+            display_df.iloc[::-1],
             use_container_width=True
         )
         
@@ -210,13 +344,13 @@ else:
         selected_indices = st.session_state.get("selected_indices", [])
         if len(selected_indices) > 0:
             selected_trade = filtered_df.iloc[selected_indices[0]]
-            if selected_trade["Image"]:
-                st.image(BytesIO(base64.b64decode(selected_trade["Image"])), 
+            if selected_trade["Has_Image"]:
+                st.image(BytesIO(gzip.decompress(st.session_state.images[selected_trade.name])), 
                         caption=f"Trade on {selected_trade['Date'].strftime('%Y-%m-%d')}")
         
         # ====== DATA EXPORT ======
         st.header("💾 Data Management")
-        csv = df.to_csv(index=False).encode()
+        csv = _export_csv(snapshot, tuple(st.session_state.image_digests.items()), st.session_state.images)
         st.download_button(
             label="Export All Trades (CSV)",
             data=csv,
@@ -225,9 +359,19 @@ else:
         )
         
         if st.button("Clear All Trades"):
-            st.session_state.trades = pd.DataFrame(columns=[
-                "Date", "Type", "R_Value", "Amount", "Image", "Notes"
-            ])
+            st.session_state.trades = new_trade_store()
+            st.session_state.images = {}
+            st.session_state.image_digests = {}
+            _enrich.clear()
+            _candlestick_figure.clear()
+            _cumulative_figure.clear()
+            _export_csv.clear()
             st.rerun()
     else:
         st.warning("No trades found in selected time period")
+
+# ====== CACHE STATS ======
+with st.sidebar:
+    with st.expander("🧮 Cache Stats"):
+        for name, stats in cache_stats().items():
+            st.caption(f"{name}: {stats['calls'] - stats['misses']} hits / {stats['misses']} misses")
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to NumPy reduceat
+    njit = None
+
+# Kept out of Trading_journal.py: Streamlit re-executes the script on every
+# interaction, while this module is imported once, so the compiled numba
+# dispatcher is reused across reruns. numba is not in requirements.txt;
+# install it to compile ohlc(), otherwise the reduceat path is used.
+
+def ohlc(dates_i8, amounts):
+    # One pass over date-sorted trades, emitting open/high/low/close per day
+    n = dates_i8.shape[0]
+    days = np.empty(n, np.int64)
+    bars = np.empty((n, 4), np.float64)
+    k = -1
+    for i in range(n):
+        amt = amounts[i]
+        if i == 0 or dates_i8[i] != dates_i8[i - 1]:
+            k += 1
+            days[k] = dates_i8[i]
+            bars[k, 0] = amt
+            bars[k, 1] = amt
+            bars[k, 2] = amt
+        else:
+            if amt > bars[k, 1]:
+                bars[k, 1] = amt
+            if amt < bars[k, 2]:
+                bars[k, 2] = amt
+        bars[k, 3] = amt
+    return days[:k + 1], bars[:k + 1]
+
+if njit is not None:
+    ohlc = njit(cache=True)(ohlc)
+
+def daily_ohlc(dates, amt):
+    if njit is not None:
+        days, bars = ohlc(dates.view("i8"), amt)
+        return pd.DataFrame({
+            "Date": days.view(dates.dtype),
+            "Low": bars[:, 2],
+            "High": bars[:, 1],
+            "Open": bars[:, 0],
+            "Close": bars[:, 3]
+        })
+    
+    # Without numba: reduce over the runs of equal (sorted) dates
+    starts = np.r_[0, np.flatnonzero(np.diff(dates)) + 1]
+    ends = np.r_[starts[1:] - 1, len(amt) - 1]
+    return pd.DataFrame({
+        "Date": dates[starts],
+        "Low": np.minimum.reduceat(amt, starts),
+        "High": np.maximum.reduceat(amt, starts),
+        "Open": amt[starts],
+        "Close": amt[ends]
+    })